@@ -93,8 +93,7 @@ def rtd_url_for_installed_version(name):
 
 intersphinx_mapping = {
     'python': ('https://docs.python.org/3', None),
-    'egcd': (rtd_url_for_installed_version('egcd'), None),
-    'rabinmiller': (rtd_url_for_installed_version('rabinmiller'), None)
+    'egcd': (rtd_url_for_installed_version('egcd'), None)
 }
 
 
@@ -3,4 +3,5 @@ from pailliers.pailliers import \
     secret, public, \
     plain, cipher, \
     encrypt, decrypt, \
+    batch_encrypt, batch_decrypt, \
     add, mul
@@ -4,12 +4,139 @@ Minimal pure-Python implementation of
 <https://en.wikipedia.org/wiki/Paillier_cryptosystem>`__.
 """
 from __future__ import annotations
-from typing import Union, Optional, Tuple
+from typing import Union, Optional, Tuple, List, Iterable
 import doctest
 import math
+import functools
+import itertools
+import operator
 import secrets
 from egcd import egcd
-from rabinmiller import rabinmiller
+
+try:
+    from gmpy2 import mpz as _mpz # pylint: disable=import-error
+except ImportError: # pragma: no cover
+    _mpz = int # pylint: disable=invalid-name
+
+_SMALL_PRIMES: Tuple[int, ...] = tuple(
+    k for k in range(2, 2000)
+    if all(k % d != 0 for d in range(2, int(k ** 0.5) + 1))
+)
+"""
+All primes below ``2000`` (used to filter out most composite candidates
+before a full primality test is performed).
+"""
+
+_SMALL_PRIMES_PRODUCT: int = functools.reduce(operator.mul, _SMALL_PRIMES)
+"""
+Product of all primes in :obj:`_SMALL_PRIMES`. A single :obj:`math.gcd`
+invocation involving this value is sufficient to determine whether a number
+has any small prime factors.
+"""
+
+_DETERMINISTIC_BOUND: int = 3317044064679887385961981
+"""
+Bound below which using the first thirteen primes as the witness bases
+makes the Miller-Rabin primality test deterministic.
+"""
+
+def _prime(number: int) -> bool:
+    """
+    Return a boolean value indicating whether the supplied integer is
+    (with overwhelming probability) prime. Inputs below
+    :obj:`_DETERMINISTIC_BOUND` are tested deterministically; for any
+    larger input, the base ``2`` is considered first and then up to five
+    randomly chosen Miller-Rabin witness bases are considered (each one is
+    drawn only if all previous ones were passed, so almost all composite
+    inputs are rejected without any random draws).
+
+    >>> [k for k in range(30) if _prime(k)]
+    [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+    >>> _prime(1999 * 2003) or _prime(2003 * 2011)
+    False
+    >>> _prime(3825123056546413051) # Strong pseudoprime to bases 2 to 23.
+    False
+    >>> _prime(65700513721) # Carmichael number.
+    False
+    >>> _prime(998244353)
+    True
+    >>> _prime(9999777777776655544433333333222111111111)
+    True
+    >>> _prime(9999777777776655544433333333222111111115)
+    False
+    """
+    if number < 2000:
+        return number in _SMALL_PRIMES
+
+    if math.gcd(number, _SMALL_PRIMES_PRODUCT) != 1:
+        return False
+
+    # Write ``number - 1`` as ``odd * (2 ** exponent)``. The lowest set bit
+    # of ``number - 1`` is isolated to avoid repeated halving.
+    exponent = ((number - 1) & -(number - 1)).bit_length() - 1
+    odd = (number - 1) >> exponent
+
+    witnesses = (
+        _SMALL_PRIMES[:13]
+        if number < _DETERMINISTIC_BOUND else
+        itertools.chain(
+            [2],
+            (2 + secrets.randbelow(number - 3) for _ in range(5))
+        )
+    )
+    for a in witnesses:
+        x = pow(_mpz(a), odd, number)
+        if x in (1, number - 1):
+            continue
+
+        for _ in range(exponent - 1):
+            x = (x * x) % number
+            if x == number - 1:
+                break
+            if x == 1: # Nontrivial square root of one was found.
+                return False
+        else:
+            return False
+
+    return True
+
+_WHEEL_DIFFS: Tuple[int, ...] = (
+    10, 2, 4, 2, 4, 6, 2, 6, 4, 2, 4, 6, 6, 2, 6, 4,
+    2, 6, 4, 6, 8, 4, 2, 4, 2, 4, 8, 6, 4, 6, 2, 4,
+    6, 2, 6, 6, 4, 2, 4, 6, 2, 6, 4, 2, 4, 2, 10, 2
+)
+"""
+Differences between consecutive integers that are coprime to
+``210 = 2 * 3 * 5 * 7``, starting from ``1``.
+"""
+
+def _prime_with_bit_length(bit_length: int) -> int:
+    """
+    Return a prime having the specified number of bits in its representation.
+    A random starting point is chosen and the search proceeds forward from it
+    (skipping all multiples of ``2``, ``3``, ``5``, and ``7``).
+
+    >>> _prime_with_bit_length(4) in (11, 13)
+    True
+    >>> p = _prime_with_bit_length(64)
+    >>> p.bit_length() == 64 and _prime(p)
+    True
+    """
+    (lower, upper) = (1 << (bit_length - 1), (1 << bit_length) - 1)
+    if upper < 2000:
+        return secrets.choice([k for k in _SMALL_PRIMES if lower <= k <= upper])
+
+    (candidate, index) = (upper + 1, 0)
+    while True:
+        if candidate > upper:
+            candidate = lower | secrets.randbits(bit_length - 1)
+            (candidate, index) = (candidate - (candidate % 210) + 1, 0)
+
+        if candidate >= lower and _prime(candidate):
+            return candidate
+
+        candidate += _WHEEL_DIFFS[index]
+        index = (index + 1) % len(_WHEEL_DIFFS)
 
 def _primes(bit_length: int) -> Tuple[int, int]:
     """
@@ -21,14 +148,12 @@ def _primes(bit_length: int) -> Tuple[int, int]:
     True
     >>> math.gcd(p, q)
     1
+    >>> _primes(3) in ((5, 7), (7, 5))
+    True
     """
-    (lower, upper) = (2 ** (bit_length - 1), (2 ** bit_length) - 1)
-    difference = upper - lower
-    (p, q) = (0, 0)
-    while p <= lower or not rabinmiller(p):
-        p = (secrets.randbelow(difference // 2) * 2) + lower + 1
-    while p == q or q <= lower or not rabinmiller(q):
-        q = (secrets.randbelow(difference // 2) * 2) + lower + 1
+    (p, q) = (_prime_with_bit_length(bit_length), 0)
+    while q in (0, p):
+        q = _prime_with_bit_length(bit_length)
 
     return (p, q)
 
@@ -48,9 +173,70 @@ def _generator(modulus: int) -> int:
 
     return g
 
-class secret(Tuple[int, int, int, int]):
+_WINDOW: int = 5
+"""
+Width (in bits) of the exponent digits used by :obj:`_fixed_base_pow`.
+"""
+
+def _fixed_base_powers(base: int, bit_length: int, modulus: int) -> List[int]:
     """
-    Wrapper class for a tuple of four integers that represents a secret key.
+    Return the list of powers ``base ** (2 ** (_WINDOW * i))`` modulo the
+    supplied modulus that is required by :obj:`_fixed_base_pow` in order to
+    support exponents having (at most) the specified number of bits.
+
+    >>> _fixed_base_powers(3, 12, 1000) == [3, pow(3, 32, 1000), pow(3, 1024, 1000)]
+    True
+    """
+    powers = []
+    for _ in range(0, bit_length, _WINDOW):
+        powers.append(base)
+        for _ in range(_WINDOW):
+            base = (base * base) % modulus
+
+    return powers
+
+def _fixed_base_pow(powers: List[int], exponent: int, modulus: int) -> int:
+    """
+    Raise a fixed base to the supplied nonnegative exponent modulo the supplied
+    modulus using the precomputed powers of that base returned by
+    :obj:`_fixed_base_powers`. Multiplications by powers that correspond to
+    exponent digits having the same value are grouped together so that only
+    about ``len(powers) + 2 ** (_WINDOW + 1)`` multiplications are performed
+    (and no squarings).
+
+    >>> powers = _fixed_base_powers(3, 64, 1000003)
+    >>> all(
+    ...     _fixed_base_pow(powers, e, 1000003) == pow(3, e, 1000003)
+    ...     for e in [0, 1, 31, 32, 2 ** 63, (2 ** 64) - 1, 12345678901234567]
+    ... )
+    True
+    """
+    mask = (1 << _WINDOW) - 1
+    buckets = [1] * (1 << _WINDOW)
+    for power in powers:
+        digit = exponent & mask
+        if digit != 0:
+            buckets[digit] = (buckets[digit] * power) % modulus
+        exponent >>= _WINDOW
+
+    # Multiply each bucket into the result as many times as its digit value.
+    (result, accumulated) = (1, 1)
+    for digit in range(mask, 0, -1):
+        accumulated = (accumulated * buckets[digit]) % modulus
+        result = (result * accumulated) % modulus
+
+    return result
+
+class secret(Tuple[int, ...]):
+    """
+    Wrapper class for a tuple of integers that represents a secret key.
+    The first four entries are the components ``(lam, mu, n, g)`` of the key
+    (where ``lam`` is Euler's totient ``(p - 1) * (q - 1)`` of ``n = p * q``
+    rather than the Carmichael function of ``n``, which is equivalent because
+    ``g = n + 1``). The remaining entries
+    ``(p, q, p ** 2, q ** 2, h_p, h_q, q_inv_p)`` are precomputed so that
+    :obj:`decrypt` can work modulo ``p ** 2`` and ``q ** 2`` separately and
+    then recombine the results via the Chinese remainder theorem.
 
     >>> secret_key = secret(2048)
     >>> public_key = public(secret_key)
@@ -68,6 +254,10 @@ class secret(Tuple[int, int, int, int]):
     Traceback (most recent call last):
       ...
     ValueError: bit length must be a positive integer
+    >>> secret(1)
+    Traceback (most recent call last):
+      ...
+    ValueError: bit length must be at least 2
     """
     def __new__(cls, bit_length: int) -> secret:
         """
@@ -80,27 +270,63 @@ class secret(Tuple[int, int, int, int]):
         if bit_length < 1:
             raise ValueError('bit length must be a positive integer')
 
+        if bit_length < 2:
+            raise ValueError('bit length must be at least 2')
+
         (p, q) = _primes(bit_length)
         n = p * q
-        lam = ((p - 1) * (q - 1)) // math.gcd(p - 1, q - 1)
-        g = None
-        while g is None:
-            g = _generator(n ** 2)
-            # pylint: disable=unbalanced-tuple-unpacking
-            (d, mu, _) = egcd((pow(g, lam, n ** 2) - 1) // n, n)
-            if d != 1: # pragma: no cover # Highly unlikely to occur.
-                g = None
+        lam = (p - 1) * (q - 1)
 
-        return tuple.__new__(cls, (lam, mu % n, n, g))
+        # Because ``g = n + 1``, it is the case that ``L(g ** lam) = lam``
+        # (where ``L(x) = (x - 1) // n``), so ``mu`` is the inverse of ``lam``.
+        g = n + 1
+        mu = egcd(lam, n)[1]
+
+        (p_sq, q_sq) = (p * p, q * q)
+        h_p = egcd((pow(g, p - 1, p_sq) - 1) // p, p)[1] % p
+        h_q = egcd((pow(g, q - 1, q_sq) - 1) // q, q)[1] % q
+        q_inv_p = egcd(q, p)[1] % p
+
+        return tuple.__new__(
+            cls,
+            (lam, mu % n, n, g, p, q, p_sq, q_sq, h_p, h_q, q_inv_p)
+        )
 
 class public(Tuple[int, int]):
     """
     Wrapper class for a pair of integers that represents a public key.
 
-    >>> public_key = public(secret(2048))
+    >>> secret_key = secret(2048)
+    >>> public_key = public(secret_key)
     >>> isinstance(public_key, public)
     True
 
+    The square of the modulus (used by all operations that involve ciphertexts)
+    is computed once and stored in the ``n_sq`` attribute of each instance.
+
+    >>> (n, g) = public_key
+    >>> g == n + 1
+    True
+    >>> public_key.n_sq == n ** 2
+    True
+
+    Each instance also stores a random ``n``-th residue modulo ``n ** 2`` in
+    its ``blinding_base`` attribute. Rather than computing ``pow(r, n, n ** 2)``
+    for a fresh random ``r`` during every encryption, :obj:`encrypt` raises this
+    base to a random exponent that has half as many bits as ``n`` (following
+    the variant of the scheme described by Damgård, Jurik, and Nielsen).
+
+    >>> decrypt(secret_key, cipher(public_key.blinding_base))
+    0
+
+    Because the base is fixed, the ``blinding_powers`` attribute holds the
+    powers of it that :obj:`_fixed_base_pow` uses to perform these
+    exponentiations.
+
+    >>> (powers, base) = (public_key.blinding_powers, public_key.blinding_base)
+    >>> _fixed_base_pow(powers, 12345, n ** 2) == pow(base, 12345, n ** 2)
+    True
+
     Any attempt to supply an argument that is of the wrong type or outside the
     supported range raises an exception.
 
@@ -117,7 +343,15 @@ class public(Tuple[int, int]):
         if not isinstance(secret_key, secret):
             raise TypeError('secret key required to create public key')
 
-        return tuple.__new__(cls, secret_key[2:])
+        instance = tuple.__new__(cls, secret_key[2:4])
+        n = instance[0]
+        instance.n_sq = _mpz(n) * n
+        h = (-pow(_generator(n), 2, n)) % n
+        instance.blinding_base = pow(h, n, instance.n_sq)
+        instance.blinding_powers = _fixed_base_powers(
+            instance.blinding_base, (n.bit_length() + 1) // 2, instance.n_sq
+        )
+        return instance
 
 class plain(int):
     """
@@ -258,7 +492,10 @@ class cipher(int):
         if public_key is None:
             raise ValueError('public key is required for addition')
 
-        ciphertext = add(public_key, self, other)
+        if not isinstance(other, cipher):
+            raise TypeError('can only add ciphertexts')
+
+        ciphertext = _add(public_key, (self, other))
         ciphertext._public_key = public_key
         return ciphertext
 
@@ -334,6 +571,13 @@ class cipher(int):
         >>> int(decrypt(secret_key, r))
         66
 
+        The scalar must be an integer.
+
+        >>> c * 'abc'
+        Traceback (most recent call last):
+          ...
+        TypeError: can only multiply by an integer scalar
+
         This instance must have a public key.
 
         >>> c = cipher(int(c))
@@ -347,7 +591,10 @@ class cipher(int):
                 'public key is required for scalar multiplication'
             )
 
-        ciphertext = mul(self._public_key, self, scalar)
+        if not isinstance(scalar, int):
+            raise TypeError('can only multiply by an integer scalar')
+
+        ciphertext = _mul(self._public_key, self, scalar)
         setattr(ciphertext, '_public_key', self._public_key)
         return ciphertext
 
@@ -411,20 +658,77 @@ def encrypt(public_key: public, plaintext: Union[plain, int]) -> cipher:
     Traceback (most recent call last):
       ...
     TypeError: can only encrypt using a public key
+    >>> encrypt(public_key, 2.0)
+    Traceback (most recent call last):
+      ...
+    TypeError: can only encrypt an integer plaintext
     """
     if not isinstance(public_key, public):
         raise TypeError('can only encrypt using a public key')
 
-    (n, g) = public_key
-    r = _generator(n)
+    if not isinstance(plaintext, int):
+        raise TypeError('can only encrypt an integer plaintext')
+
+    return _encrypt(public_key, plaintext)
+
+def batch_encrypt(
+        public_key: public,
+        plaintexts: Iterable[Union[plain, int]]
+    ) -> List[cipher]:
+    """
+    Encrypt each of the supplied plaintexts using the supplied public key
+    (checking the type of the public key only once).
+
+    >>> secret_key = secret(2048)
+    >>> public_key = public(secret_key)
+    >>> cs = batch_encrypt(public_key, [1, 2, 3])
+    >>> [decrypt(secret_key, c) for c in cs]
+    [1, 2, 3]
+    >>> decrypt(secret_key, sum(cs))
+    6
+
+    Any attempt to invoke this function using arguments that do not have the
+    expected types raises an exception.
+
+    >>> batch_encrypt(secret_key, [1, 2, 3])
+    Traceback (most recent call last):
+      ...
+    TypeError: can only encrypt using a public key
+    >>> batch_encrypt(public_key, [1, 2.0, 3])
+    Traceback (most recent call last):
+      ...
+    TypeError: can only encrypt an integer plaintext
+    """
+    if not isinstance(public_key, public):
+        raise TypeError('can only encrypt using a public key')
+
+    ciphertexts = []
+    for plaintext in plaintexts:
+        if not isinstance(plaintext, int):
+            raise TypeError('can only encrypt an integer plaintext')
+        ciphertexts.append(_encrypt(public_key, plaintext))
+
+    return ciphertexts
+
+def _encrypt(public_key: public, plaintext: Union[plain, int]) -> cipher:
+    """
+    Encrypt the supplied plaintext using the supplied public key (without
+    checking the types of the arguments).
+    """
+    (n, _) = public_key
+    n_sq = public_key.n_sq
+    x = secrets.randbits((n.bit_length() + 1) // 2)
+
+    # Because ``g = n + 1``, it is the case that ``g ** m = 1 + (m * n)``
+    # modulo ``n ** 2`` (and the right-hand side is already reduced).
     ciphertext = cipher(
         (
-            pow(g, plaintext % n, n ** 2)
+            (1 + ((plaintext % n) * n))
             *
-            pow(r, n, n ** 2)
+            _fixed_base_pow(public_key.blinding_powers, x, n_sq)
         )
         %
-        (n ** 2)
+        n_sq
     )
     setattr(ciphertext, '_public_key', public_key)
     return ciphertext
@@ -457,8 +761,54 @@ def decrypt(secret_key: secret, ciphertext: cipher) -> plain:
     if not isinstance(ciphertext, cipher):
         raise TypeError('can only decrypt a ciphertext')
 
-    (lam, mu, n, _) = secret_key
-    return plain((((pow(ciphertext, lam, n ** 2) - 1) // n) * mu) % n)
+    return _decrypt(secret_key, ciphertext)
+
+def batch_decrypt(
+        secret_key: secret,
+        ciphertexts: Iterable[cipher]
+    ) -> List[plain]:
+    """
+    Decrypt each of the supplied ciphertexts using the supplied secret key
+    (checking the type of the secret key only once).
+
+    >>> secret_key = secret(2048)
+    >>> public_key = public(secret_key)
+    >>> batch_decrypt(secret_key, batch_encrypt(public_key, [1, 2, 3]))
+    [1, 2, 3]
+
+    Any attempt to invoke this function using arguments that do not have the
+    expected types raises an exception.
+
+    >>> batch_decrypt(public_key, [encrypt(public_key, 1)])
+    Traceback (most recent call last):
+      ...
+    TypeError: can only decrypt using a secret key
+    >>> batch_decrypt(secret_key, [encrypt(public_key, 1), 123])
+    Traceback (most recent call last):
+      ...
+    TypeError: can only decrypt a ciphertext
+    """
+    if not isinstance(secret_key, secret):
+        raise TypeError('can only decrypt using a secret key')
+
+    plaintexts = []
+    for ciphertext in ciphertexts:
+        if not isinstance(ciphertext, cipher):
+            raise TypeError('can only decrypt a ciphertext')
+        plaintexts.append(_decrypt(secret_key, ciphertext))
+
+    return plaintexts
+
+def _decrypt(secret_key: secret, ciphertext: cipher) -> plain:
+    """
+    Decrypt the supplied ciphertext using the supplied secret key (without
+    checking the types of the arguments).
+    """
+    (p, q, p_sq, q_sq, h_p, h_q, q_inv_p) = secret_key[4:]
+    c = _mpz(ciphertext)
+    m_p = (((pow(c, p - 1, p_sq) - 1) // p) * h_p) % p
+    m_q = (((pow(c, q - 1, q_sq) - 1) // q) * h_q) % q
+    return plain(m_q + q * ((q_inv_p * (m_p - m_q)) % p))
 
 def add(public_key: public, *ciphertexts: cipher) -> cipher:
     """
@@ -516,12 +866,20 @@ def add(public_key: public, *ciphertexts: cipher) -> cipher:
     if len(ciphertexts) < 1:
         raise ValueError('at least one ciphertext is required')
 
-    modulus: int = public_key[0] ** 2
+    if not all(isinstance(ciphertext, cipher) for ciphertext in ciphertexts):
+        raise TypeError('can only add ciphertexts')
+
+    return _add(public_key, ciphertexts)
+
+def _add(public_key: public, ciphertexts: Iterable[cipher]) -> cipher:
+    """
+    Perform addition of one or more encrypted values to produce the encrypted
+    result (without checking the types of the arguments).
+    """
+    modulus = public_key.n_sq
     ciphertexts = iter(ciphertexts)
     result = int(next(ciphertexts))
     for ciphertext in ciphertexts:
-        if not isinstance(ciphertext, cipher):
-            raise TypeError('can only add ciphertexts')
         result = (result * int(ciphertext)) % modulus
 
     return cipher(result)
@@ -538,6 +896,23 @@ def mul(public_key: public, ciphertext: cipher, scalar: int) -> cipher:
     >>> int(decrypt(secret_key, r))
     66
 
+    Because plaintexts are integers modulo ``n`` (the first component of the
+    public key), the scalar is reduced modulo ``n`` before it is used as an
+    exponent. Thus, the cost of this operation does not grow with the size
+    of the scalar.
+
+    >>> (n, _) = public_key
+    >>> r = mul(public_key, c, 3 + (n * (2 ** 100000)))
+    >>> int(decrypt(secret_key, r))
+    66
+
+    This also means that negative scalars are supported (on all supported
+    versions of Python), making subtraction of encrypted values possible.
+
+    >>> r = add(public_key, encrypt(public_key, 30), mul(public_key, c, -1))
+    >>> int(decrypt(secret_key, r))
+    8
+
     Any attempt to invoke this function using arguments that do not have the
     expected types raises an exception.
 
@@ -563,7 +938,14 @@ def mul(public_key: public, ciphertext: cipher, scalar: int) -> cipher:
     if not isinstance(scalar, int):
         raise TypeError('can only multiply by an integer scalar')
 
-    return cipher(pow(int(ciphertext), scalar, public_key[0] ** 2))
+    return _mul(public_key, ciphertext, scalar)
+
+def _mul(public_key: public, ciphertext: cipher, scalar: int) -> cipher:
+    """
+    Perform multiplication of an encrypted value by a scalar to produce the
+    encrypted result (without checking the types of the arguments).
+    """
+    return cipher(pow(int(ciphertext), scalar % public_key[0], public_key.n_sq))
 
 if __name__ == '__main__':
     doctest.testmod() # pragma: no cover